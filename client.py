@@ -1,13 +1,39 @@
 import argparse
-import json
 import socket
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+# Prefer orjson (faster, returns bytes directly); fall back to the standard library
+# so the client still works without the optional dependency.
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+
+    def _dumps_pretty(obj: object) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+
+except ImportError:
+    import json
+
+    _loads = json.loads
+
+    def _dumps(obj: object) -> bytes:
+        # ensure_ascii (the default) escapes lone surrogates, which UTF-8 cannot encode.
+        return json.dumps(obj).encode("ascii")
+
+    def _dumps_pretty(obj: object) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
 
 # Default connection settings:
 # - 127.0.0.1 = this same computer (localhost)
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_PORT = 5050
 
+# Initial receive buffer size per connection; a typical response line arrives in a
+# single recv_into() call.
+RECV_SIZE = 64 * 1024
+
 
 def parse_kv_fields(pairs: List[str]) -> Dict[str, str]:
     """
@@ -22,44 +48,146 @@ def parse_kv_fields(pairs: List[str]) -> Dict[str, str]:
     fields: Dict[str, str] = {}
 
     for pair in pairs:
-        if "=" not in pair:
+        # Split on the first "=" in one call, so values can legally contain "=".
+        key, sep, value = pair.partition("=")
+        if not sep:
             # Fail fast on malformed input to keep requests predictable for the server.
             raise ValueError(f"Bad field '{pair}'. Use KEY=VALUE.")
 
-        # Split on the first "=", so values can legally contain "=".
-        key, value = pair.split("=", 1)
-
         # Normalize key for case-insensitive CLI input (day/Day/DAY -> DAY).
-        key = key.strip().upper()
-        value = value.strip()
-
-        fields[key] = value
+        fields[key.strip().upper()] = value.strip()
 
     return fields
 
 
-def send_request(host: str, port: int, req: dict) -> dict:
+def parse_many(pairs_lists: List[List[str]]) -> List[Dict[str, str]]:
     """
-    Send a single JSON request to the server and return the JSON response.
+    Parse several KEY=VALUE lists at once (for scripted callers building many requests).
 
-    Protocol: line-delimited JSON (one request line, one response line).
+    Example:
+        [["DAY=MON"], ["DAY=TUE", "TIME=9:00 AM"]]
+        -> [{"DAY": "MON"}, {"DAY": "TUE", "TIME": "9:00 AM"}]
+    """
+    return [parse_kv_fields(pairs) for pairs in pairs_lists]
+
+
+class _Connection:
+    """
+    An open connection to the server plus a preallocated receive buffer.
+
+    Responses are read with recv_into() straight into the buffer, which is reused
+    for every request on the connection (no per-read allocation).
     """
-    # Add a newline so the server can read exactly one message using readline().
-    payload = (json.dumps(req) + "\n").encode("utf-8")
 
-    # Timeout prevents the client from hanging if the server is down/unreachable.
-    with socket.create_connection((host, port), timeout=5) as sock:
-        sock.sendall(payload)
+    __slots__ = ("sock", "buf", "view", "size")
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buf = bytearray(RECV_SIZE)
+        self.view = memoryview(self.buf)
+        # Number of received-but-unread bytes at the start of buf.
+        self.size = 0
+
+    def read_line(self) -> bytes:
+        """
+        Read one newline-terminated line from the socket.
+
+        Bytes received past the newline stay buffered for the next call. Returns
+        whatever was buffered (possibly b"") if the server closes the connection first.
+        """
+        scan = 0
+        while True:
+            nl = self.buf.find(b"\n", scan, self.size)
+            if nl >= 0:
+                end = nl + 1
+                line = bytes(self.view[:end])
+
+                # Move any bytes of the next line to the front (rare for request/response).
+                rest = self.size - end
+                if rest:
+                    self.buf[:rest] = self.buf[end : self.size]
+                self.size = rest
+                return line
+            scan = self.size
+
+            if self.size == len(self.buf):
+                # Response longer than the buffer: grow it (rare fallback path).
+                self.view.release()
+                self.buf.extend(bytes(len(self.buf)))
+                self.view = memoryview(self.buf)
+
+            n = self.sock.recv_into(self.view[self.size :])
+            if n == 0:
+                line = bytes(self.view[: self.size])
+                self.size = 0
+                return line
+            self.size += n
+
+    def close(self) -> None:
+        self.view.release()
+        self.sock.close()
+
+
+# Open connections reused across send_request() calls, keyed by (host, port).
+# The server keeps connections alive, so scripted callers skip the TCP handshake.
+_connections: Dict[Tuple[str, int], _Connection] = {}
+
+
+def _get_connection(host: str, port: int) -> _Connection:
+    """Return the cached connection for (host, port), opening one if needed."""
+    conn = _connections.get((host, port))
+    if conn is None:
+        # Timeout prevents the client from hanging if the server is down/unreachable.
+        sock = socket.create_connection((host, port), timeout=5)
+
+        # Requests are tiny single lines: disable Nagle so they are sent immediately.
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = _Connection(sock)
+        _connections[(host, port)] = conn
+    return conn
+
+
+def close_connection(host: str, port: int) -> None:
+    """Close and forget the cached connection for (host, port), if any."""
+    conn = _connections.pop((host, port), None)
+    if conn is not None:
+        conn.close()
 
-        # Read exactly one response line from the server.
-        with sock.makefile("rb") as sock_file:
-            line = sock_file.readline()
 
-        if not line:
+def send_request(host: str, port: int, req: dict) -> dict:
+    """
+    Send a single JSON request to the server and return the JSON response.
+
+    Protocol: line-delimited JSON (one request line, one response line). The
+    connection is kept open and reused by later calls to the same host/port.
+    """
+    # Add a newline so the server can read exactly one message per line.
+    payload = _dumps(req) + b"\n"
+
+    reused = (host, port) in _connections
+    while True:
+        conn = _get_connection(host, port)
+        try:
+            conn.sock.sendall(payload)
+
+            # Read exactly one response line from the server.
+            line = conn.read_line()
+        except OSError:
+            close_connection(host, port)
+            if not reused:
+                raise
+            line = b""
+
+        if line:
+            # Parse JSON bytes -> dict (surrounding whitespace/newline is allowed).
+            return _loads(line)
+
+        close_connection(host, port)
+        if not reused:
             return {"ok": False, "error": "No response from server"}
 
-        # Decode bytes -> string and parse JSON -> dict.
-        return json.loads(line.decode("utf-8").strip())
+        # The cached connection went stale (e.g. server restarted); retry once on a fresh one.
+        reused = False
 
 
 def pretty_print(resp: dict) -> None:
@@ -70,7 +198,7 @@ def pretty_print(resp: dict) -> None:
     it is printed separately for easier viewing during demos.
     """
     # Pretty-print JSON for readability (indentation + preserve non-ASCII characters).
-    print(json.dumps(resp, indent=2, ensure_ascii=False))
+    print(_dumps_pretty(resp))
 
     # If the response includes a message body, print it in a clear section.
     if resp.get("ok") and "body" in resp:
@@ -7,9 +7,14 @@ from django.shortcuts import render
 
 
 @dataclass(frozen=True)
-class TemplateBlock:
-    title: str
-    body: str
+class TemplateStore:
+    # Parallel lists (struct-of-arrays): titles[i] goes with bodies[i].
+    titles: list[str]
+    bodies: list[str]
+
+
+# (mtime_ns, parsed store) for templates.txt; re-parsed only when the file changes.
+_CACHE: tuple[int, TemplateStore] | None = None
 
 
 def _repo_root() -> Path:
@@ -22,8 +27,8 @@ def _templates_txt_path() -> Path:
     return _repo_root() / "templates.txt"
 
 
-def _parse_templates_txt(text: str) -> list[TemplateBlock]:
-    """Parse templates.txt into blocks.
+def _parse_templates_txt(text: str) -> TemplateStore:
+    """Parse templates.txt into a TemplateStore.
 
     Expected format:
         {Button} = Title
@@ -33,81 +38,88 @@ def _parse_templates_txt(text: str) -> list[TemplateBlock]:
         {Button} = Another Title
         ...
 
-    Key idea: split by '---' separators; the first non-empty line in each block
-    provides the title, remaining lines are the body.
+    Key idea: a single pass over the lines. A line containing only '---' ends a
+    block; the first non-empty line in each block provides the title, remaining
+    lines are the body.
     """
 
-    blocks: list[TemplateBlock] = []
-
-    # Split into blocks separated by lines that contain only '---'
-    raw_blocks = text.split("---")
-
-    for raw in raw_blocks:
-        chunk = raw.strip()
-        if not chunk:
-            continue
-
-        lines = [ln.rstrip("\n") for ln in chunk.splitlines()]
-        # Remove leading/trailing blank lines
-        while lines and not lines[0].strip():
-            lines.pop(0)
-        while lines and not lines[-1].strip():
-            lines.pop()
-
-        if not lines:
-            continue
-
-        header = lines[0].strip()
-        if not header.startswith("{Button}"):
-            # Ignore blocks that don't start with the expected header
-            continue
-
-        # Parse title: allow formats like "{Button} = Title" or "{Button}=Title"
-        remainder = header.replace("{Button}", "", 1).strip()
-        if remainder.startswith("="):
-            remainder = remainder[1:].strip()
-        title = remainder
-        if not title:
-            continue
-
-        body_lines = lines[1:]
-        body = "\n".join(body_lines).strip()
-
-        blocks.append(TemplateBlock(title=title, body=body))
-
-    return blocks
-
+    titles: list[str] = []
+    bodies: list[str] = []
+    header = ""
+    body_lines: list[str] = []
+
+    def _flush() -> None:
+        nonlocal header
+        # Ignore blocks that don't start with the expected header
+        if header.startswith("{Button}"):
+            # Parse title: allow formats like "{Button} = Title" or "{Button}=Title"
+            remainder = header.replace("{Button}", "", 1).strip()
+            if remainder.startswith("="):
+                remainder = remainder[1:].strip()
+            title = remainder
+            if title:
+                titles.append(title)
+                bodies.append("\n".join(body_lines).strip())
+
+        header = ""
+        body_lines.clear()
+
+    for line in text.splitlines():
+        if line.strip() == "---":
+            _flush()
+        elif not header:
+            header = line.strip()
+        else:
+            body_lines.append(line)
+    _flush()
+
+    return TemplateStore(titles=titles, bodies=bodies)
+
+
+def load_template_store() -> TemplateStore:
+    """Load parsed templates from the repo's templates.txt file.
+
+    The parsed result is cached and reused until the file's mtime changes.
+    """
 
-def load_template_blocks() -> list[TemplateBlock]:
-    """Load parsed template blocks from the repo's templates.txt file."""
+    global _CACHE
 
     templates_file = _templates_txt_path()
-    if not templates_file.exists():
-        return []
+    try:
+        mtime_ns = templates_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return TemplateStore(titles=[], bodies=[])
+
+    cache = _CACHE
+    if cache is not None and cache[0] == mtime_ns:
+        return cache[1]
 
     text = templates_file.read_text(encoding="utf-8", errors="replace")
-    return _parse_templates_txt(text)
+    store = _parse_templates_txt(text)
+    # Replaced as one tuple so concurrent requests always see a matching pair.
+    _CACHE = (mtime_ns, store)
+    return store
 
 
 def _load_buttons_from_templates_txt() -> list[str]:
     """Load unique button titles from templates.txt."""
 
-    blocks = load_template_blocks()
+    store = load_template_store()
 
     # Deduplicate while preserving order
     seen: set[str] = set()
     unique_titles: list[str] = []
-    for b in blocks:
-        if b.title not in seen:
-            seen.add(b.title)
-            unique_titles.append(b.title)
+    for title in store.titles:
+        if title not in seen:
+            seen.add(title)
+            unique_titles.append(title)
 
     return unique_titles
 
 
 def home(request):
-    blocks = load_template_blocks()
-    buttons = [b.title for b in blocks]
+    store = load_template_store()
+    buttons = store.titles
 
     # Fallback list if templates.txt is missing or doesn't contain any {Button} blocks
     if not buttons:
@@ -120,5 +132,6 @@ def home(request):
         ]
 
     # Keep `buttons` for your current template, but also pass `blocks`
-    # so the next step can render the body text too.
+    # ((title, body) pairs) so the next step can render the body text too.
+    blocks = list(zip(store.titles, store.bodies))
     return render(request, "templates_app/home.html", {"buttons": buttons, "blocks": blocks})
@@ -1,6 +1,32 @@
-import json
+import asyncio
+import mmap
+import os
+import re
+import signal
 import socket
-from typing import Dict
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple, Union
+
+# Prefer orjson for the per-request parse/serialize hot path; fall back to the
+# standard library so the server still runs without the optional dependency.
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    import json
+
+    _loads = json.loads
+
+    def _dumps(obj: object) -> bytes:
+        # ensure_ascii (the default) escapes lone surrogates, which UTF-8 cannot encode.
+        return json.dumps(obj).encode("ascii")
 
 # Bind to all network interfaces so LAN devices can connect.
 HOST = "0.0.0.0"
@@ -10,57 +36,155 @@ PORT = 5050
 # Local data source for templates (loaded once at startup).
 TEMPLATES_FILE = "templates.txt"
 
+# Number of worker processes accepting on the shared listening socket (one per core).
+# Platforms without fork() always run a single worker.
+WORKERS = os.cpu_count() or 1
+
+# Longest accepted request line (bytes); longer lines close the connection.
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# Renders expected to produce a response at least this large (bytes) run on a
+# thread pool of OFFLOAD_THREADS threads instead of on the event loop.
+OFFLOAD_MIN_BYTES = 16 * 1024
+OFFLOAD_THREADS = 4
+
+# Max number of rendered RENDER_TEMPLATE responses kept per worker (least recently
+# used are evicted first), and the largest entry (field values + response bytes)
+# worth caching, so the cache stays around RENDER_CACHE_SIZE * 8 KiB at most.
+RENDER_CACHE_SIZE = 1024
+RENDER_CACHE_MAX_ENTRY_BYTES = 8 * 1024
+
+# Supported placeholder names, and a pattern matching any of them ({DAY}, {DATE}, {TIME}).
+PLACEHOLDERS = ("DAY", "DATE", "TIME")
+_PH_RE = re.compile(r"\{(" + "|".join(PLACEHOLDERS) + r")\}")
+
+# Used by load_templates on the raw file bytes: a block separator line ('---' with
+# optional surrounding whitespace), and the first non-blank character of a block.
+# The whitespace set is the UTF-8 encoding of what str.strip() removes within a line.
+_WS = (
+    rb"(?:[ \t\r\x0b\x0c\x1c-\x1f]|\xc2[\x85\xa0]|\xe1\x9a\x80"
+    rb"|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)"
+)
+_SEPARATOR_RE = re.compile(rb"^" + _WS + rb"*---" + _WS + rb"*$", re.MULTILINE)
+_NON_BLANK_RE = re.compile(rb"\S")
+
+# Fixed error responses, encoded once so malformed requests (and port probes)
+# are answered without any JSON encoding.
+_ERR_NOT_OBJECT = _dumps({"ok": False, "error": "Request must be a JSON object"}) + b"\n"
+_ERR_MISSING_TYPE = _dumps({"ok": False, "error": "Missing request field: type"}) + b"\n"
+_ERR_TITLE_NOT_STRING = _dumps({"ok": False, "error": "title must be a string"}) + b"\n"
+_ERR_FIELDS_NOT_DICT = _dumps({"ok": False, "error": "fields must be an object/dict"}) + b"\n"
+
+
+@dataclass(frozen=True)
+class Template:
+    # Raw body, returned as-is by GET_TEMPLATE.
+    body: str
+    # Body precompiled for rendering (see compile_template).
+    compiled: Tuple[str, ...]
+
+
+def compile_template(body: str) -> Tuple[str, ...]:
+    """
+    Precompile a template body into alternating literal text and placeholder names.
+
+    The result looks like (text, KEY, text, KEY, ..., text): placeholder names sit at
+    the odd indexes, so rendering never has to scan the body again.
+    """
+    return tuple(_PH_RE.split(body))
+
+
+def _add_template(templates: Dict[str, Template], buf: bytes, start: int, end: int) -> None:
+    """
+    Decode one block buf[start:end] of the templates file and store it if it has a title.
 
-def load_templates(path: str) -> Dict[str, str]:
+    The first non-blank line is the title; the rest (minus leading blank lines and
+    trailing whitespace) is the body.
+    """
+    title = ""
+    title_end = start
+    while not title:
+        # Lines that are blank only after decoding (e.g. a non-breaking space) are skipped too.
+        m = _NON_BLANK_RE.search(buf, title_end, end)
+        if m is None:
+            return
+        title_end = buf.find(b"\n", m.start(), end)
+        if title_end < 0:
+            title_end = end
+        title = buf[m.start() : title_end].decode("utf-8").strip()
+
+    body = buf[title_end + 1 : end].decode("utf-8")
+    if "\r" in body:
+        # Normalize Windows/old-Mac line endings, as text-mode reading would.
+        body = body.replace("\r\n", "\n").replace("\r", "\n")
+    body = body.lstrip("\n").rstrip()
+
+    templates[title] = Template(body=body, compiled=compile_template(body))
+
+
+def load_templates(path: str) -> Dict[str, Template]:
     """
     Load templates from a local file into a dictionary.
 
     File format:
-    - Templates are separated by a line containing '---'
+    - Templates are separated by a line containing only '---'
     - First line of each block is the template title (button label)
     - Remaining lines are the message body
 
+    The file is memory-mapped and separators are located directly in the raw bytes,
+    so only each title and body is decoded (no full-file string copy).
+
     Returns:
-        dict mapping {title -> body}
+        dict mapping {title -> Template}, with each body precompiled for rendering
     """
-    with open(path, "r", encoding="utf-8") as f:
-        raw = f.read()
+    templates: Dict[str, Template] = {}
 
-    # Split into blocks and ignore empty blocks.
-    blocks = [b.strip() for b in raw.split("---")]
-    templates: Dict[str, str] = {}
+    with open(path, "rb") as f:
+        # mmap cannot map an empty file.
+        if os.fstat(f.fileno()).st_size == 0:
+            return templates
 
-    for block in blocks:
-        if not block:
-            continue
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            for sep in _SEPARATOR_RE.finditer(mm):
+                _add_template(templates, mm, start, sep.start())
+                start = sep.end()
+            _add_template(templates, mm, start, len(mm))
 
-        lines = block.splitlines()
-        title = lines[0].strip()
-        body = "\n".join(lines[1:]).lstrip("\n")
+    return templates
 
-        if not title:
-            continue
 
-        templates[title] = body
+def placeholder_values(fields: dict) -> Dict[str, str]:
+    """
+    Build the substitution table for one render: placeholder name -> text.
 
-    return templates
+    Missing fields default to an empty string so the message still renders cleanly.
+    """
+    return {name: str(fields.get(name, "")) for name in PLACEHOLDERS}
 
 
-def render_template(body: str, fields: Dict[str, str]) -> str:
+def render_template(compiled: Tuple[str, ...], values: Dict[str, str]) -> str:
     """
-    Substitute supported placeholders in a template body.
+    Substitute supported placeholders in a precompiled template body.
 
     Supported placeholders: {DAY}, {DATE}, {TIME}
-    Missing fields default to an empty string so the message still renders cleanly.
+    values is the table from placeholder_values(), so each placeholder occurrence
+    is a plain dict lookup.
+
+    Only the placeholder slots are filled in, so a field value that itself looks
+    like a placeholder is inserted literally.
     """
-    for key in ("DAY", "DATE", "TIME"):
-        body = body.replace("{" + key + "}", str(fields.get(key, "")))
-    return body
+    parts = list(compiled)
+    parts[1::2] = map(values.__getitem__, compiled[1::2])
+    return "".join(parts)
 
 
-def handle_request(req: dict, templates: Dict[str, str]) -> dict:
+def handle_request(req: dict, templates: Dict[str, Template], titles: List[str]) -> Union[dict, bytes]:
     """
-    Route a request based on its "type" and return a JSON-serializable response dict.
+    Route a request based on its "type" and return a JSON-serializable response dict,
+    or an already-encoded response line for fixed errors (see encode_response).
+
+    titles is the sorted list of template titles, computed once at startup.
 
     Supported types:
     - LIST_BUTTONS: return available template titles
@@ -70,85 +194,301 @@ def handle_request(req: dict, templates: Dict[str, str]) -> dict:
     # Request type drives the routing logic.
     rtype = req.get("type")
     if not rtype:
-        return {"ok": False, "error": "Missing request field: type"}
+        return _ERR_MISSING_TYPE
 
     if rtype == "LIST_BUTTONS":
-        # Sort titles for stable output (helps demos and testing).
-        return {"ok": True, "type": "LIST_BUTTONS", "buttons": sorted(list(templates.keys()))}
+        # Titles are pre-sorted for stable output (helps demos and testing).
+        return {"ok": True, "type": "LIST_BUTTONS", "buttons": titles}
 
     if rtype == "GET_TEMPLATE":
         # Validate the requested template exists.
         title = req.get("title", "")
+        if not isinstance(title, str):
+            return _ERR_TITLE_NOT_STRING
         if title not in templates:
             return {"ok": False, "error": f"Unknown title: {title}"}
 
-        return {"ok": True, "type": "GET_TEMPLATE", "title": title, "body": templates[title]}
+        return {"ok": True, "type": "GET_TEMPLATE", "title": title, "body": templates[title].body}
 
     if rtype == "RENDER_TEMPLATE":
         # Validate title and ensure fields is a dict before rendering.
         title = req.get("title", "")
+        if not isinstance(title, str):
+            return _ERR_TITLE_NOT_STRING
         if title not in templates:
             return {"ok": False, "error": f"Unknown title: {title}"}
 
         fields = req.get("fields") or {}
         if not isinstance(fields, dict):
-            return {"ok": False, "error": "fields must be an object/dict"}
+            return _ERR_FIELDS_NOT_DICT
 
-        rendered = render_template(templates[title], fields)
+        rendered = render_template(templates[title].compiled, placeholder_values(fields))
         return {"ok": True, "type": "RENDER_TEMPLATE", "title": title, "body": rendered}
 
     # Unknown request types return a structured error for clients to display.
     return {"ok": False, "error": f"Unknown request type: {rtype}"}
 
 
-def run_server() -> None:
+def encode_response(resp: Union[dict, bytes]) -> bytes:
+    """Encode a handle_request result as one response line; pre-encoded bytes pass through."""
+    if isinstance(resp, bytes):
+        return resp
+    return _dumps(resp) + b"\n"
+
+
+# A responder maps one raw request line to its encoded response line, or to a
+# zero-argument function producing it when the work is large enough to be run
+# off the event loop (see make_responder).
+Responder = Callable[[bytes], Union[bytes, Callable[[], bytes]]]
+
+
+def make_responder(templates: Dict[str, Template]) -> Responder:
     """
-    Start the TCP server and handle one request per connection.
+    Build a function that maps one raw request line to one encoded response line.
 
-    Protocol:
-    - Client sends one newline-terminated JSON request
-    - Server sends one newline-terminated JSON response
-    - Server closes the connection, then waits for the next client
+    Responses that only depend on the (immutable) templates are encoded once here,
+    so the per-request work for them is a dict lookup. Rendered responses are kept
+    in a bounded LRU cache, since staff often repeat the same button and values.
+
+    Renders expected to reach OFFLOAD_MIN_BYTES (template body plus request size)
+    are returned as a function instead, for the caller to run on a thread pool;
+    the render cache is locked since those functions run on other threads.
     """
-    # Load templates once at startup (fast requests; avoids re-reading the file each time).
-    templates = load_templates(TEMPLATES_FILE)
-    print(f"Loaded {len(templates)} templates from {TEMPLATES_FILE}")
+    # Templates never change after startup, so titles are sorted once and the
+    # LIST_BUTTONS response is encoded once.
+    titles = sorted(templates)
+    list_buttons_bytes = encode_response(handle_request({"type": "LIST_BUTTONS"}, templates, titles))
+
+    # Same for GET_TEMPLATE: one pre-encoded response line per title.
+    get_template_bytes: Dict[str, bytes] = {
+        title: encode_response({"ok": True, "type": "GET_TEMPLATE", "title": title, "body": template.body})
+        for title, template in templates.items()
+    }
+
+    # RENDER_TEMPLATE responses keyed by (title, DAY, DATE, TIME), oldest first.
+    render_cache: "OrderedDict[Tuple[str, ...], bytes]" = OrderedDict()
+    render_cache_lock = threading.Lock()
+
+    def respond(line: bytes) -> Union[bytes, Callable[[], bytes]]:
+        # Parse request JSON; return a structured error if malformed.
+        try:
+            req = _loads(line)
+        except Exception as e:
+            return encode_response({"ok": False, "error": f"Invalid JSON: {e}"})
+        if not isinstance(req, dict):
+            return _ERR_NOT_OBJECT
+
+        # Fast paths: LIST_BUTTONS and GET_TEMPLATE (known title) are served from
+        # pre-encoded bytes, RENDER_TEMPLATE (known title) via the render cache;
+        # everything else is routed through handle_request.
+        rtype = req.get("type")
+        if rtype == "LIST_BUTTONS":
+            return list_buttons_bytes
+        if rtype == "GET_TEMPLATE":
+            title = req.get("title")
+            if isinstance(title, str):
+                cached = get_template_bytes.get(title)
+                if cached is not None:
+                    return cached
+        if rtype == "RENDER_TEMPLATE":
+            title = req.get("title")
+            fields = req.get("fields") or {}
+            if isinstance(title, str) and title in templates and isinstance(fields, dict):
+                # Only the supported placeholders affect the output, so their values
+                # form the key; the same table is reused to render on a cache miss.
+                values = placeholder_values(fields)
+                key = (title, *values.values())
+                with render_cache_lock:
+                    cached = render_cache.get(key)
+                    if cached is not None:
+                        render_cache.move_to_end(key)
+                if cached is not None:
+                    return cached
+
+                def _render() -> bytes:
+                    rendered = render_template(templates[title].compiled, values)
+                    resp = encode_response({"ok": True, "type": "RENDER_TEMPLATE", "title": title, "body": rendered})
+
+                    # Large entries (big field values or templates) are not worth keeping.
+                    if len(resp) + sum(map(len, values.values())) > RENDER_CACHE_MAX_ENTRY_BYTES:
+                        return resp
+                    with render_cache_lock:
+                        render_cache[key] = resp
+                        if len(render_cache) > RENDER_CACHE_SIZE:
+                            render_cache.popitem(last=False)
+                    return resp
+
+                # Estimate the response size from the template body plus the request
+                # line (which holds the field values).
+                if len(templates[title].body) + len(line) >= OFFLOAD_MIN_BYTES:
+                    return _render
+                return _render()
+
+        return encode_response(handle_request(req, templates, titles))
+
+    return respond
+
+
+def open_listener() -> socket.socket:
+    """
+    Create the bound, listening server socket.
 
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        # Allow quick restart without waiting for the OS to release the port.
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    It is created once, before any worker is forked, so every worker accepts from the
+    same socket and a second server instance on the port fails with "address in use".
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-        # Bind to the configured host/port and begin listening for incoming connections.
-        s.bind((HOST, PORT))
-        s.listen()
-        print(f"Server listening on {HOST}:{PORT}")
+    # Allow quick restart without waiting for the OS to release the port.
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
-        while True:
-            # Block until a client connects.
-            conn, addr = s.accept()
-            with conn:
-                print(f"Connection from {addr}")
+    # Bind to the configured host/port and begin listening for incoming connections.
+    listener.bind((HOST, PORT))
+    listener.listen()
+    return listener
 
-                # Read exactly one request message (one JSON line).
-                conn_file = conn.makefile("rwb", buffering=0)
-                line = conn_file.readline()
+
+async def serve(respond: Responder, listener: socket.socket) -> None:
+    """
+    Accept connections from listener and handle them concurrently on a single
+    asyncio event loop.
+
+    A slow client only holds up its own connection; others keep being served.
+    Several worker processes can serve the same listener; the kernel hands each
+    incoming connection to one of them.
+
+    Large renders (see make_responder) run on a small thread pool, so rendering
+    and encoding a large response does not stall other connections.
+    """
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=OFFLOAD_THREADS)
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        addr = writer.get_extra_info("peername")
+        print(f"Connection from {addr}")
+
+        # Responses are small single lines: disable Nagle so they are sent immediately.
+        # Buffer sizes are left to the kernel's auto-tuning, which can grow past any
+        # fixed value we would pick.
+        sock = writer.get_extra_info("socket")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            # Keep the connection open and serve requests until the client closes it,
+            # so bursts of requests skip the TCP handshake.
+            while True:
+                # Read one request message (one JSON line); EOF means the client is done.
+                line = await reader.readline()
                 if not line:
-                    continue
-
-                # Parse request JSON; return a structured error if malformed.
-                try:
-                    req = json.loads(line.decode("utf-8").strip())
-                except Exception as e:
-                    resp = {"ok": False, "error": f"Invalid JSON: {e}"}
-                    conn_file.write((json.dumps(resp) + "\n").encode("utf-8"))
-                    continue
-
-                # Route the request and write the response as a single JSON line.
-                resp = handle_request(req, templates)
-                conn_file.write((json.dumps(resp) + "\n").encode("utf-8"))
-
-                # Connection closes automatically when leaving the 'with conn' block.
-                print("Handled one request, closed connection.")
+                    break
+
+                # Write the response as a single JSON line; large renders come back
+                # as a function to run on the pool.
+                resp = respond(line)
+                if callable(resp):
+                    resp = await loop.run_in_executor(pool, resp)
+                writer.write(resp)
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            # Client went away mid-request, or sent an oversized line.
+            print(f"Connection from {addr} failed: {e}")
+        finally:
+            writer.close()
+            print(f"Closed connection from {addr}")
+
+    server = await asyncio.start_server(_handle, sock=listener, limit=MAX_REQUEST_BYTES)
+    print(f"Server listening on {HOST}:{PORT} (pid {os.getpid()})")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.shutdown(wait=False)
+
+
+def run_server() -> None:
+    """
+    Start the TCP server.
+
+    Protocol:
+    - Client sends a newline-terminated JSON request
+    - Server sends a newline-terminated JSON response
+    - Repeat on the same connection until the client closes it
+
+    Connections are handled concurrently, so one slow client does not block others.
+    Where supported, WORKERS processes share the listening socket to use every CPU core.
+    """
+    # Load templates once at startup (fast requests; avoids re-reading the file each time).
+    # This happens before forking, so workers share the loaded data copy-on-write.
+    templates = load_templates(TEMPLATES_FILE)
+    print(f"Loaded {len(templates)} templates from {TEMPLATES_FILE}")
+    respond = make_responder(templates)
+    listener = open_listener()
+
+    workers = WORKERS if hasattr(os, "fork") else 1
+    if workers <= 1:
+        asyncio.run(serve(respond, listener))
+        return
+
+    # Flush before forking so buffered output is not copied into every worker.
+    sys.stdout.flush()
+
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: run its own event loop on the shared listener, never return.
+            # Line-buffer stdout so log lines survive the worker being terminated.
+            sys.stdout.reconfigure(line_buffering=True)
+            code = 0
+            try:
+                asyncio.run(serve(respond, listener))
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        pids.append(pid)
+
+    # Parent: wait for the workers. The parent no longer accepts connections itself.
+    listener.close()
+    remaining = set(pids)
+    stopping = False
+
+    def _stop_workers() -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in remaining:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    # SIGTERM is forwarded to the workers; the wait loop below then ends as they exit.
+    # No exception is raised, so a repeated signal during shutdown is harmless.
+    signal.signal(signal.SIGTERM, lambda signum, frame: _stop_workers())
+
+    # If a worker fails (error exit or killed by a signal, e.g. the OOM killer), stop
+    # the others and exit non-zero. Exits caused by our own shutdown are expected.
+    failed = False
+    try:
+        while remaining:
+            pid, status = os.wait()
+            remaining.discard(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0 and not stopping:
+                how = f"was killed by signal {-code}" if code < 0 else f"exited with status {code}"
+                print(f"Worker {pid} {how}; stopping server", file=sys.stderr)
+                failed = True
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _stop_workers()
+
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":